@@ -168,7 +168,6 @@ class ConfigManager:
         return {
             'auto_reconnect': self.get('db_operation.auto_reconnect', True),
             'connection_timeout': self.get('db_operation.connection_timeout', 30),
-            'batch_insert_delay': self.get('db_operation.batch_insert_delay', 0.1),
             'max_retry_times': self.get('db_operation.max_retry_times', 3)
         }
     
@@ -5,14 +5,8 @@
 专为Windows任务计划程序设计，无需任何用户交互，直接执行Excel全自动爬取流程。
 """
 
-import os
-import sys
-
-# Add the project root directory and config directory to the path
-project_root = os.path.dirname(__file__)
-sys.path.insert(0, project_root)
-sys.path.insert(0, os.path.join(project_root, 'config'))
-
+# 以脚本方式运行时，项目根目录已由解释器放在 sys.path[0]，
+# src 与 config 均按包导入，无需再修改 sys.path。
 from src.core.main_enhanced import main
 
 if __name__ == '__main__':
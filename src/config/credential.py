@@ -1,12 +1,27 @@
 import mitmproxy.http
 import json
+import os
 import threading
 from http.server import SimpleHTTPRequestHandler, HTTPServer
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import unquote_plus
 import random
 import string
 import time
 
+# 可选：orjson 序列化更快，未安装时回退到标准库 json
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# 公众号文章链接前缀，__biz 紧随其后
+ARTICLE_URL_PREFIX = "https://mp.weixin.qq.com/s?__biz="
+
+# credentials.json 被占用时替换的重试次数与间隔（秒）
+REPLACE_RETRIES = 5
+REPLACE_RETRY_DELAY = 0.05
+
 
 class ExtractSetCookie:
     def __init__(self):
@@ -14,24 +29,60 @@ class ExtractSetCookie:
 
     def response(self, flow: mitmproxy.http.HTTPFlow):
         # 检查请求的 URL 是否符合过滤器
-        if flow.request.url.startswith("https://mp.weixin.qq.com/s?__biz="):
-            # 提取 __biz 参数
-            parsed_url = urlparse(flow.request.url)
-            query_params = parse_qs(parsed_url.query)
-            biz = query_params.get('__biz', [None])[0]
+        url = flow.request.url
+        if url.startswith(ARTICLE_URL_PREFIX):
+            # 提取 __biz 参数：前缀已定位其起点，截取到下一个 & 或 # 为止（解码规则与 parse_qs 一致）
+            start = len(ARTICLE_URL_PREFIX)
+            end = url.find("&", start)
+            biz = unquote_plus((url[start:] if end == -1 else url[start:end]).partition("#")[0])
             if biz:
                 # 提取响应头中的 Set-Cookie 数据
                 set_cookie_header = flow.response.headers.get("Set-Cookie")
                 if set_cookie_header:
+                    # 同一公众号的 Cookie 未变化时不重写文件
+                    previous = self.cookies.get(biz)
+                    if previous and previous["set_cookie"] == set_cookie_header and previous["url"] == url:
+                        return
                     timestamp = int(time.time() * 1000)
                     self.cookies[biz] = {
-                        "url": flow.request.url,
+                        "url": url,
                         "set_cookie": set_cookie_header,
                         "timestamp": timestamp,
                     }
-                    # 将 cookies 数据保存到文件中
-                    with open("credentials.json", "w") as file:
-                        json.dump(list(self.cookies.values()), file, indent=4)
+                    if not self.save_cookies():
+                        # 写入失败时撤销内存中的更新，之后相同的响应仍会重新尝试写入
+                        if previous:
+                            self.cookies[biz] = previous
+                        else:
+                            del self.cookies[biz]
+
+    def save_cookies(self) -> bool:
+        """
+        将 cookies 数据保存到文件中；先写临时文件再原子替换，HTTP 接口不会读到写了一半的文件。
+        Windows 上 HTTP 服务正读取 credentials.json 时替换会抛 PermissionError，短暂等待后重试
+
+        Returns:
+            写入成功返回True，否则返回False（临时文件会被清理）
+        """
+        tmp_path = "credentials.json.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(_dumps(list(self.cookies.values())))
+            for attempt in range(REPLACE_RETRIES):
+                try:
+                    os.replace(tmp_path, "credentials.json")
+                    return True
+                except PermissionError:
+                    if attempt == REPLACE_RETRIES - 1:
+                        raise
+                    time.sleep(REPLACE_RETRY_DELAY)
+        except OSError as e:
+            print(f"保存 credentials.json 失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
 
 
 addons = [
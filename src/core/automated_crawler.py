@@ -45,14 +45,14 @@ class AutomatedCrawler:
         self.save_to_db = save_to_db
         self.db_config = db_config or get_database_config()
         if self.save_to_db:
+            # 复用启动阶段已缓存的探测结果，避免重复连接与全表统计
             try:
-                with DatabaseManager(**self.db_config) as db:
-                    count = db.get_articles_count()
-                    self.logger.info(f"✅ 数据库连接成功！当前有 {count} 篇文章")
+                self.save_to_db = DatabaseManager.check_available(**self.db_config)
             except Exception as e:
                 self.logger.error(f"❌ 数据库连接失败: {e}")
-                self.logger.warning("⚠️ 将只保存到文件，不保存到数据库")
                 self.save_to_db = False
+            if not self.save_to_db:
+                self.logger.warning("⚠️ 将只保存到文件，不保存到数据库")
 
     def _get_all_target_urls_from_excel(self) -> list:
         """
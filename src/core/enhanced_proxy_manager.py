@@ -14,6 +14,14 @@ import shutil
 from pathlib import Path
 from typing import Optional, List
 
+# mitmproxy 证书可能的位置（首次运行 mitmdump 时在 ~/.mitmproxy 下生成）
+MITMPROXY_CERT_PATHS = (
+    os.path.expanduser("~/.mitmproxy/mitmproxy-ca-cert.crt"),
+    os.path.expanduser("~/.mitmproxy/mitmproxy-ca-cert.pem"),
+    "./mitmproxy-ca-cert.crt",
+    "./mitmproxy-ca-cert.pem"
+)
+
 class EnhancedProxyManager:
     """增强代理管理器，专门处理微信公众号访问问题"""
     
@@ -45,33 +53,25 @@ class EnhancedProxyManager:
             self.logger.error(f"❌ 设置微信代理配置失败: {e}")
             return False
     
+    @staticmethod
+    def find_mitmproxy_certificate() -> Optional[str]:
+        """返回第一个存在的mitmproxy证书路径，未找到返回None"""
+        for path in MITMPROXY_CERT_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
+
     def install_mitmproxy_certificate(self) -> bool:
         """安装mitmproxy的SSL证书到系统信任存储"""
         try:
             # 查找mitmproxy证书文件
-            possible_cert_paths = [
-                os.path.expanduser("~/.mitmproxy/mitmproxy-ca-cert.crt"),
-                os.path.expanduser("~/.mitmproxy/mitmproxy-ca-cert.pem"),
-                "./mitmproxy-ca-cert.crt",
-                "./mitmproxy-ca-cert.pem"
-            ]
-            
-            cert_path = None
-            for path in possible_cert_paths:
-                if os.path.exists(path):
-                    cert_path = path
-                    break
+            cert_path = self.find_mitmproxy_certificate()
             
             if not cert_path:
                 self.logger.warning("未找到mitmproxy证书文件，尝试生成...")
-                # 尝试启动mitmproxy生成证书
+                # 尝试启动mitmproxy生成证书，完成后再次查找
                 self.generate_mitmproxy_certificate()
-                
-                # 再次查找
-                for path in possible_cert_paths:
-                    if os.path.exists(path):
-                        cert_path = path
-                        break
+                cert_path = self.find_mitmproxy_certificate()
             
             if not cert_path:
                 self.logger.error("无法找到或生成mitmproxy证书")
@@ -94,13 +94,17 @@ class EnhancedProxyManager:
             # 启动mitmdump一小段时间来生成证书
             process = subprocess.Popen(
                 ['mitmdump', '--listen-port', '8081'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 creationflags=subprocess.CREATE_NO_WINDOW
             )
             
-            # 等待2秒让证书生成
-            time.sleep(2)
+            # 证书文件出现即结束进程，不再固定等待2秒（最多等待5秒）
+            deadline = time.time() + 5
+            while time.time() < deadline and not self.find_mitmproxy_certificate():
+                if process.poll() is not None:
+                    break
+                time.sleep(0.1)
             process.terminate()
             process.wait(timeout=5)
             
@@ -225,11 +229,11 @@ class EnhancedProxyManager:
             
             self.logger.info(f"启动增强mitmproxy: {' '.join(cmd)}")
             
+            # 输出丢弃到 DEVNULL：管道无人读取时，日志写满缓冲区会阻塞 mitmdump
             process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 creationflags=subprocess.CREATE_NO_WINDOW
             )
             
@@ -19,6 +19,10 @@ from config import get_crawler_config, get_database_config
 from src.database.database_manager import DatabaseManager
 from src.core.automated_crawler import AutomatedCrawler
 
+# 日志格式只构建一次；日期精确到秒，省去每条记录的毫秒拼接
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
 
 def setup_logging() -> logging.Logger:
     """初始化日志（同时输出到控制台与文件）"""
@@ -29,6 +33,11 @@ def setup_logging() -> logging.Logger:
     if logger.handlers:
         return logger
 
+    # 格式中未使用线程/进程字段，关闭采集以减少每条日志记录的开销
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     log_dir = os.path.join(os.getcwd(), 'logs')
     os.makedirs(log_dir, exist_ok=True)
     log_filename = os.path.join(log_dir, f"wechat_spider_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
@@ -39,7 +48,7 @@ def setup_logging() -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
 
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
 
@@ -70,14 +79,14 @@ def main():
     db_config = get_database_config()
     logger.info("🔍 测试数据库连接...")
     try:
-        with DatabaseManager(**db_config) as db:
-            count = db.get_articles_count()
-            logger.info(f"✅ 数据库连接成功！当前已有 {count} 篇文章")
-            save_to_db = True
+        save_to_db = DatabaseManager.check_available(**db_config)
     except Exception as e:
         logger.error(f"❌ 数据库连接失败: {e}")
-        logger.warning("⚠️ 将仅保存到本地文件，不写入数据库")
         save_to_db = False
+    if save_to_db:
+        logger.info("✅ 数据库连接成功！")
+    else:
+        logger.warning("⚠️ 将仅保存到本地文件，不写入数据库")
 
     try:
         logger.info("启动全自动化爬取流程...")
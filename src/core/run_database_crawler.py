@@ -125,8 +125,8 @@ def show_database_stats():
         from database_manager import DatabaseManager
         
         with DatabaseManager() as db:
-            total_count = db.get_articles_count()
-            print(f"📖 总文章数: {total_count}")
+            total_count = db.get_articles_count_approx()
+            print(f"📖 总文章数(约): {total_count}")
             
             # 可以添加更多统计信息
             print("✅ 统计信息获取成功")
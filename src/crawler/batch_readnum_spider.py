@@ -24,6 +24,17 @@ from src.utils import utils
 from src.database.database_manager import DatabaseManager
 from config import get_crawler_config
 
+# 每篇文章都会执行的正则，导入时编译一次
+PASS_TICKET_RE = re.compile(r'pass_ticket=([^;]+)')
+OG_TITLE_RE = re.compile(r'<meta property="og:title" content="(.*?)"')
+READ_NUM_RE = re.compile(r"var cgiData = {[^}]*?read_num: '(\d+)'")
+LIKE_COUNT_RE = re.compile(r"window\.appmsg_bar_data = {[^}]*?like_count: '(\d+)'")
+OLD_LIKE_COUNT_RE = re.compile(r"window\.appmsg_bar_data = {[^}]*?old_like_count: '(\d+)'")
+SHARE_COUNT_RE = re.compile(r"window\.appmsg_bar_data = {[^}]*?share_count: '(\d+)'")
+CREATE_TIME_RE = re.compile(r"var createTime = '([^']+)'")
+FOLLOW_NICKNAME_RE = re.compile(r'<div[^>]*class="wx_follow_nickname"[^>]*>\s*([^<]+)\s*</div>')
+BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
 class BatchReadnumSpider:
     """批量微信公众号阅读量抓取器"""
     
@@ -419,7 +430,7 @@ class BatchReadnumSpider:
 
             # 添加必要的参数
             # 从cookie中提取pass_ticket
-            pass_ticket_match = re.search(r'pass_ticket=([^;]+)', self.cookie_str)
+            pass_ticket_match = PASS_TICKET_RE.search(self.cookie_str)
             if pass_ticket_match:
                 params['pass_ticket'] = [pass_ticket_match.group(1)]
 
@@ -518,7 +529,7 @@ class BatchReadnumSpider:
                     }
 
                 # 提取文章基本信息
-                title_match = re.search(r'<meta property="og:title" content="(.*?)"', html_content)
+                title_match = OG_TITLE_RE.search(html_content)
 
                 title = title_match.group(1) if title_match else "未找到标题"
 
@@ -549,7 +560,7 @@ class BatchReadnumSpider:
                 # 使用spider_readnum.py中验证成功的正则表达式提取统计数据
 
                 # 提取阅读量 - 使用成功验证的模式
-                read_num_match = re.search(r"var cgiData = {[^}]*?read_num: '(\d+)'", html_content)
+                read_num_match = READ_NUM_RE.search(html_content)
                 read_count = int(read_num_match.group(1)) if read_num_match else 0
 
                 if read_count > 0:
@@ -564,7 +575,7 @@ class BatchReadnumSpider:
                     article_data["error"] = article_data.get("error") or "key_expired"
 
                 # 提取点赞数 - 使用成功验证的模式
-                like_num_match = re.search(r"window\.appmsg_bar_data = {[^}]*?like_count: '(\d+)'", html_content)
+                like_num_match = LIKE_COUNT_RE.search(html_content)
                 like_count = int(like_num_match.group(1)) if like_num_match else 0
 
                 if like_count > 0:
@@ -575,7 +586,7 @@ class BatchReadnumSpider:
                 article_data["like_count"] = like_count
 
                 # 提取历史点赞数 - 使用成功验证的模式
-                old_like_num_match = re.search(r"window\.appmsg_bar_data = {[^}]*?old_like_count: '(\d+)'", html_content)
+                old_like_num_match = OLD_LIKE_COUNT_RE.search(html_content)
                 old_like_count = int(old_like_num_match.group(1)) if old_like_num_match else 0
 
                 if old_like_count > 0:
@@ -584,7 +595,7 @@ class BatchReadnumSpider:
                 article_data["old_like_count"] = old_like_count
 
                 # 提取分享数 - 使用成功验证的模式
-                share_count_match = re.search(r"window\.appmsg_bar_data = {[^}]*?share_count: '(\d+)'", html_content)
+                share_count_match = SHARE_COUNT_RE.search(html_content)
                 share_count = int(share_count_match.group(1)) if share_count_match else 0
 
                 if share_count > 0:
@@ -712,7 +723,7 @@ class BatchReadnumSpider:
                 content_text = content_div.get_text(separator='\n', strip=True)
 
                 # 清理多余的空行
-                content_text = re.sub(r'\n\s*\n', '\n\n', content_text)
+                content_text = BLANK_LINES_RE.sub('\n\n', content_text)
                 content_text = content_text.strip()
 
                 if content_text:
@@ -747,8 +758,7 @@ class BatchReadnumSpider:
             print("🔍 开始提取发布时间...")
 
             # 优先尝试提取 var createTime = '2025-08-04 14:02'; 格式
-            createtime_pattern = r"var createTime = '([^']+)'"
-            match = re.search(createtime_pattern, html_content)
+            match = CREATE_TIME_RE.search(html_content)
             if match:
                 found_time = match.group(1)
                 print(f"✅ 通过createTime变量找到发布时间: {found_time}")
@@ -826,8 +836,7 @@ class BatchReadnumSpider:
             print("🔍 开始提取公众号名称...")
 
             # 优先尝试提取 wx_follow_nickname 类的div中的内容
-            nickname_pattern = r'<div[^>]*class="wx_follow_nickname"[^>]*>\s*([^<]+)\s*</div>'
-            match = re.search(nickname_pattern, html_content)
+            match = FOLLOW_NICKNAME_RE.search(html_content)
             if match:
                 account_name = match.group(1).strip()
                 print(f"✅ 通过wx_follow_nickname找到公众号名称: {account_name}")
@@ -5,13 +5,6 @@
 用于管理数据库连接参数和相关配置
 """
 
-import sys
-import os
-
-# Add the project root directory to the path so we can import from config
-project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.join(project_root, '..'))
-
 from config.config_manager import get_database_config as get_db_config, get_table_config as get_tbl_config, get_article_id_config as get_art_id_config, get_db_operation_config as get_db_op_config
 
 def get_database_config():
@@ -5,19 +5,101 @@
 用于将微信公众号文章数据实时插入到MySQL数据库中
 """
 
-import pymysql
 import logging
 import random
-import string
+import itertools
 import os
+import threading
+import unicodedata
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 import time
 
 from src.database.database_config import get_table_config
 
+# 数据库驱动：默认使用 PyMySQL；设置环境变量 DB_DRIVER=mysqlclient
+# 可切换为 C 实现的 MySQLdb（需 mysqlclient>=2.2）；两者 DB-API 接口基本一致，
+# 但 MySQLdb 的部分方法（如 ping）只接受位置参数，调用时不要使用关键字参数
+if os.environ.get('DB_DRIVER', '').lower() == 'mysqlclient':
+    import MySQLdb as db_driver
+    from MySQLdb.cursors import Cursor, DictCursor
+else:
+    import pymysql as db_driver
+    from pymysql.cursors import Cursor, DictCursor
+
+# 连接中断或数据库繁忙时驱动抛出的异常；连接被驱动强制关闭后的后续调用抛 InterfaceError
+RETRYABLE_ERRORS = (db_driver.OperationalError, db_driver.InterfaceError)
+
+
+def _fast_parse_dt(value: str) -> datetime:
+    """
+    解析 'YYYY-MM-DD HH:MM:SS' 格式的时间字符串；
+    按固定位置切片直接构造 datetime，格式不符时回退到 strptime（非法输入抛 ValueError）
+    """
+    if len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' ' and value[13] == ':':
+        try:
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+def _title_key(title: str) -> str:
+    """
+    标题去重键：去除首尾空白、去掉重音符号并忽略大小写，
+    与 article_title 列的 *_ci / *_ai_ci 排序规则的比较结果保持一致
+    """
+    decomposed = unicodedata.normalize('NFKD', title.strip())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
 class DatabaseManager:
     """数据库管理器，负责微信公众号文章数据的数据库操作"""
+
+    # 文章ID后4位使用的进程级递增序号（随机起点），所有实例共享，加锁保证多线程下不重复取号
+    _article_id_seq = itertools.count(random.randrange(10000))
+    _article_id_lock = threading.Lock()
+
+    # 进程内已确认可用的数据库: (host, port, database)；探测失败不缓存，之后调用会重新探测
+    _available_databases: Set[tuple] = set()
+
+    # 批量插入时每条多行 INSERT 携带的最大行数；实际分块同时受 max_allowed_packet 限制
+    BATCH_CHUNK_SIZE = 500
+
+    # 无法读取 @@max_allowed_packet 时使用的默认值（MySQL 5.7 默认 4MB）
+    DEFAULT_MAX_ALLOWED_PACKET = 4 * 1024 * 1024
+
+    # 按字节分块时为协议头等预留的余量
+    PACKET_HEADROOM = 1024
+
+    # 可整块重试的服务端错误码：连接数过多、服务器关闭中、锁等待超时、死锁
+    # （2000 以上为客户端错误码，均为连接类错误，同样可重试）
+    RETRYABLE_SERVER_ERRNOS = (1040, 1053, 1205, 1213)
+
+    # is_connected 免 ping 的时间窗口（秒）
+    PING_INTERVAL = 30
+
+    # 建立连接失败时的最大尝试次数（带随机抖动的指数退避）
+    CONNECT_RETRIES = 3
+
+    # 批量插入单块遇到 RETRYABLE_ERRORS 时的最大重试次数
+    MAX_CHUNK_RETRIES = 3
+
+    # existing_titles 单条 IN 查询携带的标题数
+    TITLE_LOOKUP_CHUNK_SIZE = 1000
+
+    # 由调用方提供取值的文章列（create_time/update_time 由数据库 NOW() 生成）
+    ARTICLE_COLUMNS = ('crawl_time', 'crawl_channel', 'unit_name', 'article_title', 'article_content',
+                       'publish_time', 'view_count', 'likes', 'comments', 'article_url', 'article_id')
+
+    # 插入行元组中标题所在位置（_prepare_insert_data 按 ARTICLE_COLUMNS 顺序返回元组）
+    TITLE_INDEX = ARTICLE_COLUMNS.index('article_title')
+
+    # 插入列对应的取值清单：位置占位符，参数按 ARTICLE_COLUMNS 顺序传入元组
+    INSERT_VALUE_LIST = ', '.join(['%s'] * len(ARTICLE_COLUMNS)) + ', NOW(), NOW()'
+
+    # 单行 VALUES 模板；批量插入时逐行 mogrify 后以逗号拼接为多行 INSERT
+    INSERT_VALUES_TEMPLATE = f"({INSERT_VALUE_LIST})"
     
     def __init__(self, host='127.0.0.1', port=3306, user='root', password='root', database='faxuan', table_name: Optional[str] = None):
         """
@@ -36,20 +118,25 @@ class DatabaseManager:
         self.password = password
         self.database = database
         self.connection = None
+        self._cursor = None
+        self._max_allowed_packet = None
+        self._last_verified = 0.0
+        self._connect_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
 
         # 读取表配置
         table_cfg = get_table_config()
         self.table_name = table_name or table_cfg.get('table_name', 'fx_article_records')
         self.crawl_channel_default = table_cfg.get('crawl_channel_default', '微信公众号')
+        self._build_sql_templates()
 
-        # 初始化数据库连接
-        self.connect()
+        # 数据库连接在首次使用时由 _ensure_connection 建立，数据库暂时不可用不影响构造
     
     def connect(self) -> bool:
         """建立数据库连接"""
+        self._cursor = None
         try:
-            self.connection = pymysql.connect(
+            self.connection = db_driver.connect(
                 host=self.host,
                 port=self.port,
                 user=self.user,
@@ -57,30 +144,118 @@ class DatabaseManager:
                 database=self.database,
                 charset='utf8mb4',
                 autocommit=True,  # 自动提交
-                cursorclass=pymysql.cursors.DictCursor
+                cursorclass=DictCursor
             )
-            self.logger.info(f"✅ 数据库连接成功: {self.host}:{self.port}/{self.database}")
+            self._last_verified = time.monotonic()
+            self.logger.info("✅ 数据库连接成功: %s:%s/%s", self.host, self.port, self.database)
             return True
         except Exception as e:
-            self.logger.error(f"❌ 数据库连接失败: {e}")
+            self.logger.error("❌ 数据库连接失败: %s", e)
             return False
     
     def disconnect(self):
         """关闭数据库连接"""
+        self._cursor = None
         if self.connection:
             self.connection.close()
             self.logger.info("数据库连接已关闭")
     
     def is_connected(self) -> bool:
-        """检查数据库连接状态"""
+        """
+        检查数据库连接状态；最近 PING_INTERVAL 秒内确认过且套接字仍打开时直接返回，
+        不再每次调用都发送 COM_PING（查询出错时驱动会关闭套接字，下次调用即重新探测）
+        """
+        if not self.connection:
+            return self._ensure_connection()
+        if self.connection.open and time.monotonic() - self._last_verified < self.PING_INTERVAL:
+            return True
         try:
-            if self.connection:
-                self.connection.ping(reconnect=True)
-                return True
-        except:
+            self.connection.ping(True)  # reconnect；MySQLdb 的 ping 不接受关键字参数
+            self._last_verified = time.monotonic()
+            return True
+        except Exception:
             return False
-        return False
     
+    def _ensure_connection(self) -> bool:
+        """
+        确保连接可用：首次使用时建立连接，断开后重连；
+        连接失败按 CONNECT_RETRIES 次带随机抖动的指数退避重试，加锁避免多线程重复连接
+
+        Returns:
+            连接可用返回True，否则返回False
+        """
+        if self.connection is not None and self.is_connected():
+            return True
+        with self._connect_lock:
+            if self.connection is not None and self.is_connected():
+                return True
+            for attempt in range(self.CONNECT_RETRIES):
+                if attempt:
+                    time.sleep(random.uniform(0.1, 0.5) * 2 ** attempt)
+                if self.connect():
+                    return True
+            return False
+
+    def _get_cursor(self):
+        """
+        返回绑定到当前连接的复用游标，
+        避免插入与去重等热路径上每次调用都新建并关闭游标；
+        使用元组游标，单值查询无需为每行构造字典（连接默认的 DictCursor 留给外部调用方）
+        """
+        if self._cursor is None:
+            self._cursor = self.connection.cursor(Cursor)
+        return self._cursor
+
+    def _execute(self, sql: str, args=None):
+        """
+        在复用游标上执行语句并返回游标；执行成功即说明连接可用，
+        顺带刷新 is_connected 的免 ping 时间窗口，持续使用中的连接无需定期 ping
+        """
+        cursor = self._get_cursor()
+        cursor.execute(sql, args)
+        self._last_verified = time.monotonic()
+        return cursor
+
+    def ping(self) -> bool:
+        """
+        轻量连通性探测，执行 SELECT 1 而不是对整表做 COUNT(*)
+
+        Returns:
+            连接可用返回True，否则返回False
+        """
+        if not self.connection:
+            return False
+        try:
+            with self.connection.cursor(Cursor) as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception as e:
+            self.logger.error("数据库连通性探测失败: %s", e)
+            return False
+
+    @classmethod
+    def check_available(cls, **db_config) -> bool:
+        """
+        探测数据库是否可用；成功结果在进程生命周期内缓存，启动阶段多处调用时只真正连接一次，
+        失败结果不缓存，数据库稍后启动时再次调用即可探测到
+
+        Args:
+            db_config: 与构造函数相同的连接参数
+
+        Returns:
+            数据库可用返回True，否则返回False
+        """
+        cache_key = (db_config.get('host'), db_config.get('port'), db_config.get('database'))
+        if cache_key in cls._available_databases:
+            return True
+        with cls(**db_config) as db:
+            # 探测只尝试连接一次，数据库不可用时不在启动阶段反复退避
+            available = db.connect() and db.ping()
+        if available:
+            cls._available_databases.add(cache_key)
+        return available
+
     def reconnect(self) -> bool:
         """重新连接数据库"""
         self.logger.info("尝试重新连接数据库...")
@@ -90,7 +265,7 @@ class DatabaseManager:
     def generate_article_id(self, crawl_time: datetime) -> str:
         """
         生成文章ID
-        格式：前12位为crawl_time时间(YYYYMMDDHHMM)，后4位为随机数
+        格式：前12位为crawl_time时间(YYYYMMDDHHMM)，后4位为序号
         
         Args:
             crawl_time: 爬取时间
@@ -101,10 +276,10 @@ class DatabaseManager:
         # 前12位：年月日时分
         time_part = crawl_time.strftime('%Y%m%d%H%M')
         
-        # 后4位：随机数
-        random_part = ''.join(random.choices(string.digits, k=4))
-        
-        return time_part + random_part
+        # 后4位：随机起点的进程级递增序号，同一进程内各实例共享，同一分钟内生成不会互相碰撞
+        with self._article_id_lock:
+            seq = next(self._article_id_seq)
+        return f"{time_part}{seq % 10000:04d}"
     
     def insert_article(self, article_data: Dict[str, Any]) -> bool:
         """
@@ -125,86 +300,117 @@ class DatabaseManager:
         Returns:
             插入成功返回True，失败返回False
         """
-        if not self.is_connected():
-            if not self.reconnect():
-                return False
+        if not self._ensure_connection():
+            return False
 
-        # 检查标题是否已存在（去重）
         article_title = article_data.get('title', '').strip()
-        if article_title and self.check_article_title_exists(article_title):
-            self.logger.info(f"⚠️ 文章标题已存在，跳过插入: {article_title}")
-            return False
 
         try:
-            # 准备数据
-            current_time = datetime.now()
-            crawl_time = article_data.get('crawl_time')
-            
-            # 如果crawl_time是字符串，转换为datetime对象
-            if isinstance(crawl_time, str):
-                try:
-                    crawl_time = datetime.strptime(crawl_time, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    crawl_time = current_time
-            elif not isinstance(crawl_time, datetime):
-                crawl_time = current_time
-            
-            # 处理发布时间
-            publish_time = article_data.get('pub_time')
-            if isinstance(publish_time, str):
-                try:
-                    publish_time = datetime.strptime(publish_time, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    publish_time = None
-            elif not isinstance(publish_time, datetime):
-                publish_time = None
-            
-            # 生成文章ID
-            article_id = self.generate_article_id(crawl_time)
+            row = self._prepare_insert_data(article_data)
+
+            # 执行插入；有标题时去重检查合并进同一条语句，标题已存在则不插入任何行
+            if article_title:
+                sql, args = self._sql_insert_if_new_title, row + (article_title,)
+            else:
+                sql, args = self._sql_insert, row
+            try:
+                cursor = self._execute(sql, args)
+            except RETRYABLE_ERRORS as e:
+                # 免 ping 窗口内连接可能已被服务端断开（重启、wait_timeout），重连后重试一次
+                if not self._is_retryable(e) or not self._ensure_connection():
+                    raise
+                self.logger.warning("插入时数据库连接中断，重连后重试: %s", e)
+                cursor = self._execute(sql, args)
+            if article_title and cursor.rowcount == 0:
+                self.logger.info("⚠️ 文章标题已存在，跳过插入: %s", article_title)
+                return False
             
-            # 准备插入数据
-            insert_data = {
-                'crawl_time': crawl_time,
-                'crawl_channel': self.crawl_channel_default,  # 从配置读取默认值
-                'unit_name': article_data.get('unit_name', ''),
-                'article_title': article_data.get('title', ''),
-                'article_content': article_data.get('content', ''),
-                'publish_time': publish_time,
-                'view_count': article_data.get('view_count'),
-                'likes': article_data.get('like_count'),  # 映射 like_count 到 likes 字段
-                'comments': article_data.get('share_count'),  # 映射 share_count 到 comments 字段
-                'article_url': article_data.get('url', ''),
-                'article_id': article_id,
-                'create_time': current_time,
-                'update_time': current_time
-            }
+            self.logger.info("✅ 文章插入成功: %s (ID: %s)", article_data.get('title', 'Unknown'), row[-1])
+            return True
             
-            # 构建SQL语句
-            sql = f"""
+        except Exception as e:
+            self.logger.error("❌ 文章插入失败: %s", e)
+            self.logger.error("文章数据: %s", article_data)
+            return False
+
+    def _build_sql_templates(self):
+        """
+        根据表名一次性构建各语句模板，热路径直接复用，无需每次调用重新格式化SQL
+        """
+        insert_columns = f"""
             INSERT INTO {self.table_name}
             (crawl_time, crawl_channel, unit_name, article_title, article_content,
              publish_time, view_count, likes, comments, article_url, article_id, create_time, update_time)
-            VALUES
-            (%(crawl_time)s, %(crawl_channel)s, %(unit_name)s, %(article_title)s, %(article_content)s,
-             %(publish_time)s, %(view_count)s, %(likes)s, %(comments)s, %(article_url)s, %(article_id)s, %(create_time)s, %(update_time)s)
             """
-            
-            # 执行插入
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql, insert_data)
-            
-            self.logger.info(f"✅ 文章插入成功: {article_data.get('title', 'Unknown')} (ID: {article_id})")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"❌ 文章插入失败: {e}")
-            self.logger.error(f"文章数据: {article_data}")
-            return False
+        # 多行 INSERT 的前缀（列清单 + VALUES）
+        self._sql_insert_prefix = insert_columns + "VALUES\n"
+        # 单行文章插入语句
+        self._sql_insert = self._sql_insert_prefix + self.INSERT_VALUES_TEMPLATE
+        # 标题不存在时才插入的单行语句，一次往返完成去重与插入
+        self._sql_insert_if_new_title = (
+            insert_columns
+            + f"SELECT {self.INSERT_VALUE_LIST} FROM DUAL "
+            + f"WHERE NOT EXISTS (SELECT 1 FROM {self.table_name} WHERE article_title = %s)")
+        self._sql_check_url = f"SELECT EXISTS(SELECT 1 FROM {self.table_name} WHERE article_url = %s)"
+        self._sql_check_title = f"SELECT EXISTS(SELECT 1 FROM {self.table_name} WHERE article_title = %s)"
+        self._sql_count = f"SELECT COUNT(*) FROM {self.table_name}"
+        self._sql_count_approx = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                                  "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s")
+
+    def _prepare_insert_data(self, article_data: Dict[str, Any]) -> tuple:
+        """
+        将爬虫输出的文章字典转换为插入语句参数
+
+        Args:
+            article_data: 文章数据字典，字段同 insert_article
+
+        Returns:
+            按 ARTICLE_COLUMNS 顺序排列的参数元组（article_id 位于末尾）
+        """
+        # create_time/update_time 由数据库 NOW() 生成，此处仅作 crawl_time 兜底
+        current_time = datetime.now()
+        crawl_time = article_data.get('crawl_time')
+
+        # 如果crawl_time是字符串，转换为datetime对象
+        if isinstance(crawl_time, str):
+            try:
+                crawl_time = _fast_parse_dt(crawl_time)
+            except ValueError:
+                crawl_time = current_time
+        elif not isinstance(crawl_time, datetime):
+            crawl_time = current_time
+
+        # 处理发布时间
+        publish_time = article_data.get('pub_time')
+        if isinstance(publish_time, str):
+            try:
+                publish_time = _fast_parse_dt(publish_time)
+            except ValueError:
+                publish_time = None
+        elif not isinstance(publish_time, datetime):
+            publish_time = None
+
+        return (
+            crawl_time,
+            self.crawl_channel_default,  # crawl_channel 从配置读取默认值
+            article_data.get('unit_name', ''),
+            article_data.get('title', '').strip(),  # 与去重时使用的标题一致
+            article_data.get('content', ''),
+            publish_time,
+            article_data.get('view_count'),
+            article_data.get('like_count'),  # 映射 like_count 到 likes 字段
+            article_data.get('share_count'),  # 映射 share_count 到 comments 字段
+            article_data.get('url', ''),
+            self.generate_article_id(crawl_time)
+        )
     
     def batch_insert_articles(self, articles_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         批量插入文章数据
 
+        去重后按 BATCH_CHUNK_SIZE 行且不超过 max_allowed_packet 分块，每块在一个事务内拼接为一条多行 INSERT 发送；
+        若某块因数据错误、包过大等非连接类原因失败，则在同一事务内退回逐行插入以定位失败的文章。
+
         Args:
             articles_data: 文章数据列表
 
@@ -215,41 +421,231 @@ class DatabaseManager:
             self.logger.warning("没有文章数据需要插入")
             return {'success': 0, 'duplicate': 0, 'failed': 0}
 
+        if not self._ensure_connection():
+            return {'success': 0, 'duplicate': 0, 'failed': len(articles_data)}
+
         success_count = 0
         duplicate_count = 0
         failed_count = 0
         total_count = len(articles_data)
 
-        self.logger.info(f"开始批量插入 {total_count} 篇文章...")
+        self.logger.info("开始批量插入 %d 篇文章...", total_count)
 
-        for i, article_data in enumerate(articles_data, 1):
+        # 1. 一次性查出库中已存在的标题，再在内存中去重（同一批次内的重复标题同样跳过）；
+        #    库中比较按列的排序规则忽略大小写与重音，内存中按 _title_key 做同样的归一化
+        titles = [article_data.get('title', '').strip() for article_data in articles_data]
+        seen_keys = {_title_key(title) for title in self.existing_titles([title for title in titles if title])}
+        rows = []
+        for i, (article_data, article_title) in enumerate(zip(articles_data, titles), 1):
+            key = _title_key(article_title) if article_title else None
+            if key is not None and key in seen_keys:
+                duplicate_count += 1
+                self.logger.info("进度: %d/%d - 标题重复，跳过: %s", i, total_count, article_title)
+                continue
             try:
-                article_title = article_data.get('title', 'Unknown')
-
-                # 检查标题是否重复
-                if article_data.get('title', '').strip() and self.check_article_title_exists(article_data.get('title', '').strip()):
-                    duplicate_count += 1
-                    self.logger.info(f"进度: {i}/{total_count} - 标题重复，跳过: {article_title}")
-                    continue
-
-                if self.insert_article(article_data):
-                    success_count += 1
-                    self.logger.info(f"进度: {i}/{total_count} - 成功插入文章: {article_title}")
-                else:
-                    failed_count += 1
-                    self.logger.error(f"进度: {i}/{total_count} - 插入失败: {article_title}")
-
-                # 添加小延迟避免数据库压力过大
-                time.sleep(0.1)
-
+                rows.append(self._prepare_insert_data(article_data))
             except Exception as e:
                 failed_count += 1
-                self.logger.error(f"批量插入第 {i} 篇文章时出错: {e}")
+                self.logger.error("批量插入第 %d 篇文章时出错: %s", i, e)
+                continue
+            # 行准备成功后才登记标题，准备失败的文章不会让后续同标题文章被误判为重复
+            if key is not None:
+                seen_keys.add(key)
+
+        # 2. 分块多行插入，每块一个事务（每块写入前由 _insert_chunk_with_retry 确认连接可用）
+        chunks, oversized = self._split_into_chunks(rows)
+        for row in oversized:
+            failed_count += 1
+            self.logger.error("插入失败: %s (单行超过 max_allowed_packet)", row[self.TITLE_INDEX])
+        for chunk in chunks:
+            inserted, failed = self._insert_chunk_with_retry(chunk)
+            success_count += inserted
+            failed_count += failed
 
         result = {'success': success_count, 'duplicate': duplicate_count, 'failed': failed_count}
-        self.logger.info(f"批量插入完成: 成功 {success_count} 篇，重复 {duplicate_count} 篇，失败 {failed_count} 篇")
+        self.logger.info("批量插入完成: 成功 %d 篇，重复 %d 篇，失败 %d 篇", success_count, duplicate_count, failed_count)
         return result
     
+    def _insert_chunk_with_retry(self, chunk: List[tuple]) -> tuple:
+        """
+        以一个事务写入一块文章；写入节奏交由数据库自身控制，
+        仅在 RETRYABLE_ERRORS（锁等待超时、连接中断等）时退避重试，
+        每次尝试前先确认连接可用，断连后自动重连
+
+        Returns:
+            (成功数量, 失败数量)
+        """
+        for attempt in range(self.MAX_CHUNK_RETRIES + 1):
+            if attempt:
+                delay = min(2 ** (attempt - 1), 5)
+                self.logger.warning("%d 秒后重试批量插入（第 %d 次）", delay, attempt)
+                time.sleep(delay)
+            if not self._ensure_connection():
+                continue
+            try:
+                with self.batch_transaction():
+                    inserted, failed = self._insert_chunk(chunk)
+                self.logger.info("成功插入 %d 篇文章（本块 %d 篇）", inserted, len(chunk))
+                return inserted, failed
+            except RETRYABLE_ERRORS as e:
+                self.logger.warning("批量插入遇到数据库繁忙/断连: %s", e)
+            except Exception as e:
+                self.logger.error("提交批量插入事务失败: %s", e)
+                return 0, len(chunk)
+        self.logger.error("批量插入重试 %d 次后仍失败，本块 %d 篇文章未写入", self.MAX_CHUNK_RETRIES, len(chunk))
+        return 0, len(chunk)
+
+    def _split_into_chunks(self, rows: List[tuple]) -> tuple:
+        """
+        将插入参数按 BATCH_CHUNK_SIZE 行分块，并按 mogrify 后的累计字节数切分，
+        保证每条多行 INSERT 不超过服务端的 max_allowed_packet；
+        单行即超限的文章无法写入，不发送给服务端（否则服务端会直接断开连接）
+
+        Returns:
+            (块列表, 超限行列表)，每块为 (插入参数, 该行 VALUES 语句片段) 列表
+        """
+        cursor = self._get_cursor()
+        limit = (self._get_max_allowed_packet() - len(self._sql_insert_prefix.encode('utf-8'))
+                 - self.PACKET_HEADROOM)
+        chunks = []
+        oversized = []
+        chunk = []
+        chunk_bytes = 0
+        for row in rows:
+            values = cursor.mogrify(self.INSERT_VALUES_TEMPLATE, row)
+            size = len(values.encode('utf-8')) + 2  # 行间的 ",\n"
+            if size > limit:
+                oversized.append(row)
+                continue
+            if chunk and (len(chunk) >= self.BATCH_CHUNK_SIZE or chunk_bytes + size > limit):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append((row, values))
+            chunk_bytes += size
+        if chunk:
+            chunks.append(chunk)
+        return chunks, oversized
+
+    def _get_max_allowed_packet(self) -> int:
+        """读取并缓存服务端的 max_allowed_packet，读取失败时使用 DEFAULT_MAX_ALLOWED_PACKET"""
+        if self._max_allowed_packet is None:
+            try:
+                cursor = self._execute("SELECT @@max_allowed_packet")
+                self._max_allowed_packet = int(cursor.fetchone()[0])
+            except Exception as e:
+                self.logger.warning("读取 max_allowed_packet 失败，按默认值 %d 分块: %s",
+                                    self.DEFAULT_MAX_ALLOWED_PACKET, e)
+                return self.DEFAULT_MAX_ALLOWED_PACKET
+        return self._max_allowed_packet
+
+    @classmethod
+    def _is_retryable(cls, error: Exception) -> bool:
+        """
+        判断错误是否应整块重试：连接类错误与锁冲突可重试；
+        数据错误、包过大等服务端错误（同样以 OperationalError 抛出）重试也不会成功
+        """
+        if isinstance(error, db_driver.InterfaceError):
+            return True
+        if isinstance(error, db_driver.OperationalError):
+            errno = error.args[0] if error.args else None
+            if not isinstance(errno, int):
+                return True  # 无错误码时无法判断，按连接类错误处理
+            return errno >= 2000 or errno in cls.RETRYABLE_SERVER_ERRNOS
+        return False
+
+    def _insert_chunk(self, chunk: List[tuple]) -> tuple:
+        """
+        以一条多行 INSERT 写入一块文章；因非连接类错误整块失败时退回逐行插入以定位失败的文章
+
+        Args:
+            chunk: _split_into_chunks 生成的 (插入参数, VALUES 片段) 列表
+
+        Returns:
+            (成功数量, 失败数量)
+
+        Raises:
+            RETRYABLE_ERRORS: 连接中断或锁冲突，由调用方整块重试
+        """
+        try:
+            self._execute(self._sql_insert_prefix + ",\n".join(values for _, values in chunk))
+            return len(chunk), 0
+        except Exception as e:
+            if self._is_retryable(e):
+                raise
+            self.logger.warning("多行插入失败，改为逐行插入: %s", e)
+
+        # 多行语句包过大时服务端会断开连接，逐行插入前先重连（此时事务内尚无已写入的行）
+        if not self.connection.open and not self._ensure_connection():
+            raise db_driver.InterfaceError("数据库连接已断开且重连失败")
+
+        sql = self._sql_insert
+        inserted = failed = 0
+        for row, _ in chunk:
+            try:
+                self._execute(sql, row)
+                inserted += 1
+            except Exception as row_error:
+                if self._is_retryable(row_error):
+                    raise
+                failed += 1
+                self.logger.error("插入失败: %s (%s)", row[self.TITLE_INDEX], row_error)
+        return inserted, failed
+
+    @contextmanager
+    def batch_transaction(self):
+        """
+        批量写入事务：临时关闭自动提交，块内语句一次提交，异常时回滚，
+        避免每行单独提交带来的日志刷盘开销
+        """
+        self.connection.autocommit(False)
+        try:
+            yield
+            self.connection.commit()
+        except Exception:
+            try:
+                self.connection.rollback()
+            except RETRYABLE_ERRORS:
+                # 连接已断开时服务端会自动回滚未提交的事务，保留原始异常向上抛出
+                pass
+            raise
+        finally:
+            try:
+                self.connection.autocommit(True)
+            except RETRYABLE_ERRORS:
+                # 连接已断开时由重连恢复默认的自动提交模式
+                pass
+
+    def existing_titles(self, titles: List[str]) -> Set[str]:
+        """
+        批量查询已存在的文章标题（用于批量去重），
+        按 TITLE_LOOKUP_CHUNK_SIZE 分块执行 IN 查询，article_title 上应建有索引
+
+        Args:
+            titles: 待检查的文章标题列表
+
+        Returns:
+            其中已存在于数据库的标题集合
+        """
+        existing = set()
+        unique_titles = list(dict.fromkeys(titles))
+        if not unique_titles:
+            return existing
+
+        if not self._ensure_connection():
+            return existing
+
+        try:
+            for offset in range(0, len(unique_titles), self.TITLE_LOOKUP_CHUNK_SIZE):
+                chunk = unique_titles[offset:offset + self.TITLE_LOOKUP_CHUNK_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                sql = f"SELECT DISTINCT article_title FROM {self.table_name} WHERE article_title IN ({placeholders})"
+                cursor = self._execute(sql, chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            self.logger.error("批量检查文章标题是否存在时出错: %s", e)
+        return existing
+
     def check_article_exists(self, article_url: str) -> bool:
         """
         检查文章是否已存在（根据URL判断）
@@ -260,18 +656,14 @@ class DatabaseManager:
         Returns:
             存在返回True，不存在返回False
         """
-        if not self.is_connected():
-            if not self.reconnect():
-                return False
+        if not self._ensure_connection():
+            return False
 
         try:
-            sql = f"SELECT COUNT(*) as count FROM {self.table_name} WHERE article_url = %s"
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql, (article_url,))
-                result = cursor.fetchone()
-                return result['count'] > 0
+            cursor = self._execute(self._sql_check_url, (article_url,))
+            return cursor.fetchone()[0] == 1
         except Exception as e:
-            self.logger.error(f"检查文章是否存在时出错: {e}")
+            self.logger.error("检查文章是否存在时出错: %s", e)
             return False
 
     def check_article_title_exists(self, article_title: str) -> bool:
@@ -284,18 +676,14 @@ class DatabaseManager:
         Returns:
             存在返回True，不存在返回False
         """
-        if not self.is_connected():
-            if not self.reconnect():
-                return False
+        if not self._ensure_connection():
+            return False
 
         try:
-            sql = f"SELECT COUNT(*) as count FROM {self.table_name} WHERE article_title = %s"
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql, (article_title,))
-                result = cursor.fetchone()
-                return result['count'] > 0
+            cursor = self._execute(self._sql_check_title, (article_title,))
+            return cursor.fetchone()[0] == 1
         except Exception as e:
-            self.logger.error(f"检查文章标题是否存在时出错: {e}")
+            self.logger.error("检查文章标题是否存在时出错: %s", e)
             return False
     
     def get_articles_count(self) -> int:
@@ -305,20 +693,37 @@ class DatabaseManager:
         Returns:
             文章总数
         """
-        if not self.is_connected():
-            if not self.reconnect():
-                return 0
+        if not self._ensure_connection():
+            return 0
         
         try:
-            sql = f"SELECT COUNT(*) as count FROM {self.table_name}"
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql)
-                result = cursor.fetchone()
-                return result['count']
+            cursor = self._execute(self._sql_count)
+            return cursor.fetchone()[0]
         except Exception as e:
-            self.logger.error(f"获取文章总数时出错: {e}")
+            self.logger.error("获取文章总数时出错: %s", e)
             return 0
     
+    def get_articles_count_approx(self) -> int:
+        """
+        获取文章总数的估算值，读取 information_schema.TABLES.TABLE_ROWS，无需扫描索引；
+        InnoDB 的统计值本身是估算且可能被缓存（MySQL 8 受 information_schema_stats_expiry 影响），
+        仅用于进度展示等不要求精确的场景，需要精确值请使用 get_articles_count
+
+        Returns:
+            文章总数估算值，统计信息不可用时回退为精确计数
+        """
+        if not self._ensure_connection():
+            return 0
+
+        try:
+            cursor = self._execute(self._sql_count_approx, (self.database, self.table_name))
+            row = cursor.fetchone()
+            if row and row[0] is not None:
+                return int(row[0])
+        except Exception as e:
+            self.logger.warning("获取文章总数估算值失败，改为精确计数: %s", e)
+        return self.get_articles_count()
+
     def __enter__(self):
         """上下文管理器入口"""
         return self
@@ -1,5 +1,6 @@
 import json
 import re
+import socket
 import winreg
 import atexit
 import time
@@ -7,6 +8,24 @@ import threading
 from datetime import datetime
 from mitmproxy import http
 
+# 需要拦截的微信域名
+WECHAT_DOMAIN = "mp.weixin.qq.com"
+
+# 微信公众号文章URL格式：https://mp.weixin.qq.com/s?__biz=xxx&mid=xxx&sn=xxx
+WECHAT_ARTICLE_PREFIXES = ('https://mp.weixin.qq.com/s', 'http://mp.weixin.qq.com/s')
+WECHAT_ARTICLE_URL_RE = re.compile(r'^https?://mp\.weixin\.qq\.com/s\?.*__biz=')
+
+# 需要记录的关键Cookie名称片段
+KEY_COOKIES = ("session_key", "uin", "skey", "p_skey", "wxuin", "data_bizuin", "appmsg_token", "pass_ticket", "wap_sid2")
+
+# 需要记录的关键请求头（参考spider_readnum.py中的成功实现），按写入顺序排列
+IMPORTANT_HEADERS = (
+    'x-wechat-key', 'x-wechat-uin', 'exportkey',
+    'user-agent', 'accept', 'accept-language',
+    'cache-control', 'sec-fetch-site', 'sec-fetch-mode',
+    'sec-fetch-dest', 'priority'
+)
+
 class WechatCookieExtractor:
     def __init__(self):
         self.keys_file = "wechat_keys.txt"
@@ -59,15 +78,12 @@ class WechatCookieExtractor:
         return False
 
     def is_proxy_port_ready(self):
-        """检查代理端口是否可用"""
-        import socket
+        """检查代理端口是否可用（本机回环连接，短超时即可）"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('127.0.0.1', 8080))
-            sock.close()
-            return result == 0
-        except:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(0.05)
+                return sock.connect_ex(('127.0.0.1', 8080)) == 0
+        except OSError:
             return False
 
     def set_system_proxy(self):
@@ -97,13 +113,8 @@ class WechatCookieExtractor:
     
     def tls_clienthello(self, data):
         """处理TLS握手，忽略非微信域名的证书错误"""
-        # 只对微信相关域名进行SSL拦截
-        wechat_domains = [
-            "mp.weixin.qq.com",
-        ]
-        
-        # 如果不是微信域名，不进行SSL拦截
-        if not any(domain in str(data.context.server.address) for domain in wechat_domains):
+        # 只对微信相关域名进行SSL拦截，不是微信域名则直接返回
+        if WECHAT_DOMAIN not in str(data.context.server.address):
             return
         
     def request(self, flow: http.HTTPFlow) -> None:
@@ -115,18 +126,12 @@ class WechatCookieExtractor:
             self.save_keys_and_url(request)
     
     def is_wechat_article_url(self, url: str) -> bool:
-        """精确判断是否为微信公众号文章链接"""
-        # 微信公众号文章URL格式：https://mp.weixin.qq.com/s?__biz=xxx&mid=xxx&sn=xxx
-        pattern = r'^https?://mp\.weixin\.qq\.com/s\?.*__biz='
-        return bool(re.match(pattern, url))
+        """精确判断是否为微信公众号文章链接；先做前缀判断，绝大多数非微信流量无需进入正则"""
+        return url.startswith(WECHAT_ARTICLE_PREFIXES) and WECHAT_ARTICLE_URL_RE.match(url) is not None
     
     def is_wechat_request(self, request) -> bool:
-        """判断是否为微信公众号相关请求"""
-        wechat_domains = [
-            "mp.weixin.qq.com",
-        ]
-        
-        return any(domain in request.pretty_host for domain in wechat_domains)
+        """判断是否为微信公众号相关请求（单次子串判断，不构造域名列表）"""
+        return WECHAT_DOMAIN in request.pretty_host
     
     def save_keys_and_url(self, request):
         """保存Cookie、URL和关键Headers到统一文件，避免重复记录"""
@@ -138,31 +143,21 @@ class WechatCookieExtractor:
         if request.pretty_url in self.saved_urls:
             return
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
         # 提取并合并所有关键Cookie为一行
         cookies_string = ""
         if request.cookies:
             cookie_parts = []
-            key_cookies = ["session_key", "uin", "skey", "p_skey", "wxuin", "data_bizuin", "appmsg_token", "pass_ticket", "wap_sid2"]
 
             for cookie_name, cookie_value in request.cookies.items():
-                if any(key in cookie_name.lower() for key in key_cookies) or len(cookie_value) > 20:
+                if len(cookie_value) > 20 or any(key in cookie_name.lower() for key in KEY_COOKIES):
                     cookie_parts.append(f"{cookie_name}={cookie_value}")
 
             if cookie_parts:
                 cookies_string = "; ".join(cookie_parts)
 
-        # 提取关键的请求头参数（参考spider_readnum.py中的成功实现）
+        # 提取关键的请求头参数
         key_headers = {}
-        important_headers = [
-            'x-wechat-key', 'x-wechat-uin', 'exportkey',
-            'user-agent', 'accept', 'accept-language',
-            'cache-control', 'sec-fetch-site', 'sec-fetch-mode',
-            'sec-fetch-dest', 'priority'
-        ]
-
-        for header_name in important_headers:
+        for header_name in IMPORTANT_HEADERS:
             if header_name in request.headers:
                 key_headers[header_name] = request.headers[header_name]
 
@@ -174,6 +169,8 @@ class WechatCookieExtractor:
         self.saved_urls.add(request.pretty_url)
         self.saved_cookies.add(cookies_string)
 
+        # 仅在确定写入时才取时间并格式化
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         with open(self.keys_file, "a", encoding="utf-8") as f:
             f.write(f"{'='*60}\n")
             f.write(f"time: {timestamp}\n")
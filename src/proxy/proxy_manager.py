@@ -3,6 +3,8 @@
 代理管理器 - 确保代理正确开关控制
 解决Windows环境下mitmproxy代理无法完全关闭的问题
 """
+import ctypes
+import socket
 import subprocess
 import time
 import winreg
@@ -10,6 +12,29 @@ import logging
 import requests
 from typing import Optional
 
+# 网络探测中可预期的失败类型；其余异常属于程序错误，直接向上抛出
+PROBE_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError, OSError)
+
+# WinINet 选项：广播设置已变更 / 让已打开的句柄重新加载设置
+INTERNET_OPTION_SETTINGS_CHANGED = 39
+INTERNET_OPTION_REFRESH = 37
+
+
+def notify_proxy_settings_changed() -> bool:
+    """
+    写完注册表后通知 WinINet 代理设置已变更，使新设置立即生效，
+    调用方无需再固定等待
+
+    Returns:
+        通知成功返回True，否则返回False
+    """
+    try:
+        internet_set_option = ctypes.windll.wininet.InternetSetOptionW
+        return bool(internet_set_option(None, INTERNET_OPTION_SETTINGS_CHANGED, None, 0)
+                    and internet_set_option(None, INTERNET_OPTION_REFRESH, None, 0))
+    except (AttributeError, OSError):
+        return False
+
 class ProxyManager:
     """代理管理器，确保代理设置正确开关"""
     
@@ -17,36 +42,34 @@ class ProxyManager:
         self.logger = logging.getLogger(__name__)
         self.proxy_port = 8080
         self.original_proxy_settings = {}
+        # 本实例最近一次写入并确认的代理配置，备份时可直接复用而无需再读注册表
+        self._known_proxy_config = None
         
     def is_proxy_working(self, timeout: int = 5) -> bool:
         """检查代理服务器是否正常工作"""
-        try:
-            proxies = {
-                'http': f'http://127.0.0.1:{self.proxy_port}',
-                'https': f'http://127.0.0.1:{self.proxy_port}'
-            }
+        proxies = {
+            'http': f'http://127.0.0.1:{self.proxy_port}',
+            'https': f'http://127.0.0.1:{self.proxy_port}'
+        }
 
-            # 使用多个备选网站进行测试，提高成功率
-            test_urls = [
-                'http://www.baidu.com',      # 国内稳定网站
-                'http://www.qq.com',         # 备选网站1
-                'https://www.baidu.com',     # HTTPS测试
-            ]
+        # 使用多个备选网站进行测试，提高成功率
+        test_urls = [
+            'http://www.baidu.com',      # 国内稳定网站
+            'http://www.qq.com',         # 备选网站1
+            'https://www.baidu.com',     # HTTPS测试
+        ]
 
-            for url in test_urls:
-                try:
-                    response = requests.get(url, proxies=proxies, timeout=timeout)
-                    if response.status_code == 200:
-                        self.logger.debug(f"代理测试成功: {url}")
-                        return True
-                except Exception as e:
-                    self.logger.debug(f"代理测试失败 {url}: {e}")
-                    continue
+        for url in test_urls:
+            try:
+                response = requests.get(url, proxies=proxies, timeout=timeout)
+                if response.status_code == 200:
+                    self.logger.debug("代理测试成功: %s", url)
+                    return True
+            except PROBE_ERRORS as e:
+                self.logger.debug("代理测试失败 %s: %s", url, e)
+                continue
 
-            return False
-        except Exception as e:
-            self.logger.debug(f"代理测试异常: {e}")
-            return False
+        return False
     
     def is_system_proxy_enabled(self) -> bool:
         """检查系统代理是否启用"""
@@ -80,13 +103,20 @@ class ProxyManager:
                 'server': proxy_server
             }
         except Exception as e:
-            self.logger.error(f"获取代理配置失败: {e}")
+            self.logger.error("获取代理配置失败: %s", e)
             return {'enable': False, 'server': ""}
     
     def backup_proxy_settings(self):
-        """备份原始代理设置"""
-        self.original_proxy_settings = self.get_system_proxy_config()
-        self.logger.info(f"已备份原始代理设置: {self.original_proxy_settings}")
+        """备份原始代理设置（刚由本实例写入并确认过的配置直接复用）"""
+        if self._known_proxy_config is not None:
+            self.original_proxy_settings = dict(self._known_proxy_config)
+        else:
+            self.original_proxy_settings = self.get_system_proxy_config()
+        self.logger.info("已备份原始代理设置: %s", self.original_proxy_settings)
+    
+    def has_backup(self) -> bool:
+        """本实例是否已备份过原始代理设置"""
+        return bool(self.original_proxy_settings)
     
     def restore_proxy_settings(self):
         """恢复原始代理设置"""
@@ -104,9 +134,11 @@ class ProxyManager:
                 winreg.SetValueEx(key, "ProxyServer", 0, winreg.REG_SZ, '')
             
             winreg.CloseKey(key)
+            notify_proxy_settings_changed()
+            self._known_proxy_config = None
             self.logger.info("已恢复原始代理设置")
         except Exception as e:
-            self.logger.error(f"恢复代理设置失败: {e}")
+            self.logger.error("恢复代理设置失败: %s", e)
     
     def enable_proxy(self, port: int = 8080):
         """启用代理"""
@@ -119,13 +151,15 @@ class ProxyManager:
             winreg.SetValueEx(key, "ProxyServer", 0, winreg.REG_SZ, f"127.0.0.1:{port}")
             winreg.SetValueEx(key, "ProxyEnable", 0, winreg.REG_DWORD, 1)
             winreg.CloseKey(key)
+            self._known_proxy_config = None  # 代理启用期间 mitmproxy 插件也会改写注册表
             
-            self.logger.info(f"系统代理已设置为 127.0.0.1:{port}")
-            time.sleep(2)  # 等待设置生效
+            self.logger.info("系统代理已设置为 127.0.0.1:%s", port)
+            if not notify_proxy_settings_changed():
+                time.sleep(2)  # 无法通知 WinINet 时等待设置生效
             return True
             
         except Exception as e:
-            self.logger.error(f"设置代理失败: {e}")
+            self.logger.error("设置代理失败: %s", e)
             return False
     
     def disable_proxy(self):
@@ -138,11 +172,13 @@ class ProxyManager:
             winreg.SetValueEx(key, "ProxyEnable", 0, winreg.REG_DWORD, 0)
             winreg.SetValueEx(key, "ProxyServer", 0, winreg.REG_SZ, '')
             winreg.CloseKey(key)
+            notify_proxy_settings_changed()
             
             # 验证代理确实已关闭
             max_wait = 10
             for i in range(max_wait):
                 if not self.is_system_proxy_enabled():
+                    self._known_proxy_config = {'enable': False, 'server': ''}
                     self.logger.info("系统代理已成功关闭")
                     return True
                 time.sleep(1)
@@ -151,21 +187,18 @@ class ProxyManager:
             return False
             
         except Exception as e:
-            self.logger.error(f"关闭代理失败: {e}")
+            self.logger.error("关闭代理失败: %s", e)
             return False
     
-    def is_port_listening(self, port: int = None) -> bool:
-        """检查端口是否在监听"""
+    def is_port_listening(self, port: int = None, timeout: float = 0.05) -> bool:
+        """检查端口是否在监听（本机回环连接，短超时即可）"""
         if port is None:
             port = self.proxy_port
         try:
-            import socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('127.0.0.1', port))
-            sock.close()
-            return result == 0
-        except Exception:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                return sock.connect_ex(('127.0.0.1', port)) == 0
+        except OSError:
             return False
 
     def wait_for_proxy_ready(self, max_wait: int = 30) -> bool:
@@ -173,17 +206,19 @@ class ProxyManager:
         start_time = time.time()
         self.logger.info("等待代理服务启动...")
 
-        # 首先等待端口开始监听
+        # 首先等待端口开始监听：从10ms起指数退避轮询（上限200ms），端口就绪后几十毫秒内即可发现
         port_ready = False
+        delay = 0.01
         while time.time() - start_time < 10:  # 最多等待10秒端口监听
             if self.is_port_listening():
-                self.logger.info(f"✅ 端口 {self.proxy_port} 已开始监听")
+                self.logger.info("✅ 端口 %s 已开始监听", self.proxy_port)
                 port_ready = True
                 break
-            time.sleep(1)
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.2)
 
         if not port_ready:
-            self.logger.error(f"❌ 端口 {self.proxy_port} 在10秒内未开始监听")
+            self.logger.error("❌ 端口 %s 在10秒内未开始监听", self.proxy_port)
             return False
 
         # 然后测试代理功能
@@ -192,92 +227,72 @@ class ProxyManager:
                 self.logger.info("✅ 代理服务已启动并正常工作")
                 return True
             elapsed = int(time.time() - start_time)
-            self.logger.debug(f"代理功能测试中... ({elapsed}s/{max_wait}s)")
+            self.logger.debug("代理功能测试中... (%ss/%ss)", elapsed, max_wait)
             time.sleep(2)
 
-        self.logger.error(f"❌ 代理服务启动超时 ({max_wait}秒)")
+        self.logger.error("❌ 代理服务启动超时 (%s秒)", max_wait)
         return False
     
-    def kill_mitmproxy_processes(self):
-        """强制停止所有mitmproxy相关进程"""
+    def kill_mitmproxy_processes(self) -> bool:
+        """
+        强制停止所有mitmdump进程；按映像名由系统一次性筛选并结束，
+        无需先用 tasklist 查询（没有匹配进程时 taskkill 返回非零）
+
+        Returns:
+            确实结束了进程返回True，否则返回False
+        """
         try:
-            # 在Windows上结束mitmproxy进程
-            result = subprocess.run(['taskkill', '/f', '/im', 'mitmdump.exe'], 
-                                  capture_output=True, text=True, timeout=5)
+            result = subprocess.run(['taskkill', '/f', '/im', 'mitmdump.exe'],
+                                    capture_output=True, text=True, timeout=5,
+                                    creationflags=subprocess.CREATE_NO_WINDOW)
             if result.returncode == 0:
                 self.logger.info("已强制结束所有mitmdump.exe进程")
-            
-            # 使用更精确的任务终止，避免误杀当前Python进程
-            try:
-                # 查找当前用户的mitmdump相关进程
-                process_result = subprocess.run(['tasklist', '/fi', 'imagename eq mitmdump.exe'], 
-                                              capture_output=True, text=True, timeout=3)
-                if 'mitmdump.exe' in process_result.stdout.lower():
-                    # 找到特定进程，使用更安全的终止方式
-                    subprocess.run(['taskkill', '/f', '/im', 'mitmdump.exe'], 
-                                 capture_output=True, text=True, timeout=3)
-                    self.logger.info("已安全结束剩余的mitmproxy进程")
-            except Exception:
-                pass  # 忽略次要错误，避免程序终止
-                
-        except Exception as e:
-            self.logger.warning(f"结束进程时出错: {e}")
+                return True
+        except (OSError, subprocess.SubprocessError) as e:
+            self.logger.warning("结束进程时出错: %s", e)
+        return False
     
     def validate_and_fix_network(self):
         """验证网络连接正常"""
-        try:
-            # 测试不使用代理是否能连接外网，使用多个备选网站
-            test_urls = [
-                'https://www.baidu.com',
-                'http://www.baidu.com',
-                'https://www.qq.com'
-            ]
+        # 测试不使用代理是否能连接外网，使用多个备选网站
+        test_urls = [
+            'https://www.baidu.com',
+            'http://www.baidu.com',
+            'https://www.qq.com'
+        ]
 
-            for url in test_urls:
-                try:
-                    response = requests.get(url, timeout=5)
-                    if response.status_code == 200:
-                        self.logger.info(f"✅ 网络连接正常（无代理）- 测试网站: {url}")
-                        return True
-                except Exception as e:
-                    self.logger.debug(f"网络测试失败 {url}: {e}")
-                    continue
+        for url in test_urls:
+            try:
+                response = requests.get(url, timeout=5)
+                if response.status_code == 200:
+                    self.logger.info("✅ 网络连接正常（无代理）- 测试网站: %s", url)
+                    return True
+            except PROBE_ERRORS as e:
+                self.logger.debug("网络测试失败 %s: %s", url, e)
+                continue
 
-            self.logger.error("❌ 网络连接异常: 所有测试网站均无法访问")
-            return False
-        except Exception as e:
-            self.logger.error(f"❌ 网络连接验证异常: {e}")
-            return False
+        self.logger.error("❌ 网络连接异常: 所有测试网站均无法访问")
+        return False
     
     def reset_network_state(self):
         """重置网络状态到干净状态 - 增强版本"""
         self.logger.info("=== 开始重置网络状态 ===")
         
-        # 1. 延迟结束代理进程，避免重叠操作
-        try:
-            self.logger.info("🔍 正在检查并结束现有代理进程...")
-            # 先检查是否真的需要结束进程
-            process_list = subprocess.run(['tasklist', '/fi', 'imagename eq mitmdump.exe'], 
-                                        capture_output=True, text=True, timeout=3)
-            if 'mitmdump.exe' in process_list.stdout.lower():
-                self.logger.info("检测到运行中的mitmdump进程，执行结束操作...")
-                self.kill_mitmproxy_processes()
-                time.sleep(1)  # 给系统一点时间清理
-            else:
-                self.logger.info("未发现运行中的mitmdump进程，跳过进程结束步骤")
-                
-        except Exception as e:
-            self.logger.warning(f"⚠️ 检查代理进程时出错: {e}，继续执行下一步")
-            time.sleep(1)  # 给系统一点时间
+        # 1. 结束现有代理进程（一次 taskkill，无匹配进程时直接跳过）
+        self.logger.info("🔍 正在检查并结束现有代理进程...")
+        if self.kill_mitmproxy_processes():
+            time.sleep(1)  # 给系统一点时间清理
+        else:
+            self.logger.info("未发现运行中的mitmdump进程，跳过进程结束步骤")
         
         # 2. 安全关闭代理设置
         operation_success = True
         try:
             self.logger.info("🔧 正在关闭系统代理设置...")
             proxy_disabled = self.disable_proxy()
-            self.logger.info(f"{'✅' if proxy_disabled else '✅ 但已尝试'} 代理关闭操作")
+            self.logger.info("%s 代理关闭操作", '✅' if proxy_disabled else '✅ 但已尝试')
         except Exception as e:
-            self.logger.warning(f"⚠️ 关闭代理设置时发生错误: {e}")
+            self.logger.warning("⚠️ 关闭代理设置时发生错误: %s", e)
             # 这个错误不那么关键，继续执行
         
         # 3. 谨慎验证网络连接（减少重试，降低超时风险）
@@ -293,15 +308,15 @@ class ProxyManager:
                     self.logger.info("✅ 网络状态重置验证完成")
                     return True
                 
-                self.logger.info(f"验证中: 代理状态={proxy_enabled}, 网络状态={network_ok}")
+                self.logger.info("验证中: 代理状态=%s, 网络状态=%s", proxy_enabled, network_ok)
                 
             except Exception as e:
-                self.logger.warning(f"⚠️ 第{attempt + 1}次网络检查时出错: {e}")
+                self.logger.warning("⚠️ 第%s次网络检查时出错: %s", attempt + 1, e)
                 # 网络检查失败不是程序终止的理由
                 time.sleep(1)  # 简短延迟
             
             if attempt < max_retries - 1:
-                self.logger.info(f"🔄 简要重试检查 {attempt + 1}/{max_retries}")
+                self.logger.info("🔄 简要重试检查 %s/%s", attempt + 1, max_retries)
             
         self.logger.info("ℹ️ 网络重置流程已完成，代理清理已执行")
         return True  # 即使有网络访问问题，也允许程序继续
@@ -1,70 +1,153 @@
 # read_cookie.py
-import re
 import os
+import shutil
 import subprocess
+import threading
 import time
 import logging
 from datetime import datetime
 from src.proxy.proxy_manager import ProxyManager
 
+# mitmdump 加载的抓取插件，路径在导入时解析一次
+EXTRACTOR_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'cookie_extractor.py')
+
+# 项目根目录下的日志目录；mitmdump 输出写在这里，不随启动时的工作目录漂移
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), 'logs')
+
+# cookie_extractor.py 写入的记录分隔符
+RECORD_SEPARATOR = b'=' * 60
+
+# 有效记录至少包含 allurl: 与 Cookies: 两个标记，更短的片段直接跳过
+MIN_RECORD_SIZE = len(b'allurl:') + len(b'Cookies:')
+
+
+def _extract_value(text: str, key: str, terminator: str):
+    """截取 key 之后到 terminator（或结尾）之间的取值，不存在或为空时返回None"""
+    start = text.find(key)
+    if start == -1:
+        return None
+    start += len(key)
+    end = text.find(terminator, start)
+    return (text[start:] if end == -1 else text[start:end]) or None
+
 class ReadCookie(object):
     """
     启动cookie_extractor.py和解析cookie文件
     """
 
+    # 从文件末尾向前读取时每次读取的字节数
+    TAIL_CHUNK_SIZE = 64 * 1024
+
+    # wait_for_new_cookie 检查文件的间隔（秒）
+    POLL_INTERVAL = 0.1
+
+    # mitmdump 控制台输出写入的日志文件（位于 LOG_DIR，每次启动覆盖，大小仅限单次运行）
+    MITM_LOG_FILE = os.path.join(LOG_DIR, "mitmdump.log")
+
+    # 已确认可用的mitmdump版本: (路径, st_mtime_ns, st_size) -> 版本信息，进程内共享
+    _mitmdump_versions = {}
+
     def __init__(self, outfile="wechat_keys.txt", delete_existing_file: bool = True):
         self.outfile = outfile
         self.mitm_process = None
         self.logger = logging.getLogger()
         self.proxy_manager = ProxyManager()
+        # parse_cookie 的结果缓存: ((st_mtime_ns, st_size), 解析结果)
+        self._parse_cache = (None, None)
         # 根据参数决定是否删除旧文件
         if delete_existing_file and os.path.exists(self.outfile):
             os.remove(self.outfile)
-            self.logger.info(f"已删除旧的日志文件: {self.outfile}")
+            self.logger.info("已删除旧的日志文件: %s", self.outfile)
 
     def parse_cookie(self):
         """
         解析cookie文件，提取最新的appmsg_token、biz、cookie_str和headers
         :return: appmsg_token, biz, cookie_str, headers
         """
-        if not os.path.exists(self.outfile):
-            self.logger.warning(f"文件 {self.outfile} 不存在")
+        try:
+            st = os.stat(self.outfile)
+        except FileNotFoundError:
+            self.logger.warning("文件 %s 不存在", self.outfile)
             return None, None, None, None
 
-        with open(self.outfile, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        records = content.split('=' * 60)
-        for record in reversed(records):
-            if 'Cookies:' in record and 'allurl:' in record:
-                lines = record.strip().split('\n')
-                url_line = cookie_line = None
-                headers_section = False
-                headers = {}
-                for line in lines:
-                    if line.startswith('allurl:'): url_line = line
-                    elif line.startswith('Cookies:'): cookie_line = line
-                    elif line.startswith('Headers:'): headers_section = True
-                    elif headers_section and line.startswith('  '):
-                        header_match = re.match(r'\s+([^:]+):\s*(.+)', line)
-                        if header_match:
-                            headers[header_match.group(1).strip()] = header_match.group(2).strip()
-                
-                if url_line and cookie_line:
-                    url = url_line.split('allurl:', 1)[1].strip()
-                    biz_match = re.search(r'__biz=([^&]+)', url)
-                    biz = biz_match.group(1) if biz_match else None
-                    cookie_str = cookie_line.split('Cookies:', 1)[1].strip()
-                    appmsg_token_match = re.search(r'appmsg_token=([^;]+)', cookie_str)
-                    appmsg_token = appmsg_token_match.group(1) if appmsg_token_match else None
-
-                    if appmsg_token and biz and cookie_str:
-                        self.logger.info("从文件中解析到有效Cookie数据。")
-                        return appmsg_token, biz, cookie_str, headers
-        
+        # 文件未变化（修改时间与大小均相同）时直接复用上次的解析结果
+        cache_key = (st.st_mtime_ns, st.st_size)
+        if cache_key != self._parse_cache[0]:
+            self._parse_cache = (cache_key, self._parse_latest_record())
+        appmsg_token, biz, cookie_str, headers = self._parse_cache[1]
+        return appmsg_token, biz, cookie_str, dict(headers) if headers is not None else None
+
+    def _parse_latest_record(self):
+        """由新到旧查找第一条包含有效appmsg_token、biz和cookie的记录"""
+        for lines in self._iter_candidate_records():
+            url_line = cookie_line = None
+            headers_start = None
+            for index, line in enumerate(lines):
+                if line.startswith('allurl:'): url_line = line
+                elif line.startswith('Cookies:'): cookie_line = line
+                elif headers_start is None and line.startswith('Headers:'): headers_start = index + 1
+
+            if not (url_line and cookie_line):
+                continue
+            url = url_line.split('allurl:', 1)[1].strip()
+            biz = _extract_value(url, '__biz=', '&')
+            cookie_str = cookie_line.split('Cookies:', 1)[1].strip()
+            appmsg_token = _extract_value(cookie_str, 'appmsg_token=', ';')
+            if not (appmsg_token and biz and cookie_str):
+                continue
+
+            # 记录确认有效后才解析请求头
+            headers = {}
+            if headers_start is not None:
+                for line in lines[headers_start:]:
+                    if line.startswith('  '):
+                        # 形如 "  name: value"，按第一个冒号切分；名称或取值为空的行跳过
+                        header_name, sep, header_value = line.partition(':')
+                        header_name = header_name.strip()
+                        header_value = header_value.strip()
+                        if sep and header_name and header_value:
+                            headers[header_name] = header_value
+
+            self.logger.info("从文件中解析到有效Cookie数据。")
+            return appmsg_token, biz, cookie_str, headers
+
         self.logger.warning("在文件中未找到有效的Cookie数据。")
         return None, None, None, None
 
+    def _iter_candidate_records(self):
+        """
+        由新到旧产出同时包含 allurl: 与 Cookies: 标记的记录（已按行切分），
+        标记均为ASCII，直接在字节串上判断，只有候选记录才做UTF-8解码
+        """
+        for raw_record in self._iter_records_reversed():
+            if len(raw_record) < MIN_RECORD_SIZE:
+                continue
+            if b'Cookies:' in raw_record and b'allurl:' in raw_record:
+                yield raw_record.decode('utf-8', errors='replace').splitlines()
+
+    def _iter_records_reversed(self):
+        """
+        从文件末尾按 TAIL_CHUNK_SIZE 分块向前读取，由新到旧逐条产出记录（未解码的字节串）；
+        最新的有效记录通常就在最后一块中，找到后即停止，无需读取整个文件
+        """
+        with open(self.outfile, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            pending = b''  # 起点尚在更前面的块中、还不完整的最前一段
+            while pos > 0:
+                read_size = min(self.TAIL_CHUNK_SIZE, pos)
+                pos -= read_size
+                f.seek(pos)
+                buffer = f.read(read_size) + pending
+                # 用 rfind 由后向前定位分隔符，只切出实际被消费的记录，不构建整块的记录列表
+                end = len(buffer)
+                sep_index = buffer.rfind(RECORD_SEPARATOR, 0, end)
+                while sep_index != -1:
+                    yield buffer[sep_index + len(RECORD_SEPARATOR):end]
+                    end = sep_index
+                    sep_index = buffer.rfind(RECORD_SEPARATOR, 0, end)
+                pending = buffer[:end]
+            yield pending
+
     def start_cookie_extractor(self) -> bool:
         """
         在后台启动cookie_extractor.py进行cookie抓取 (非阻塞)
@@ -74,56 +157,54 @@ class ReadCookie(object):
         try:
             # 确保网络状态是干净的
             self.logger.info("步骤1: 正在准备网络环境...")
-            if not self.proxy_manager.reset_network_state():
-                self.logger.warning("⚠️ 网络清理可能存在异常，继续尝试启动...")
+            if self.proxy_manager.has_backup() or self.proxy_manager.is_system_proxy_enabled():
+                if not self.proxy_manager.reset_network_state():
+                    self.logger.warning("⚠️ 网络清理可能存在异常，继续尝试启动...")
+            else:
+                # 首次启动且系统代理未开启：只需清掉可能残留的mitmdump，跳过代理关闭与网络验证
+                self.logger.info("系统代理未启用，跳过网络重置")
+                self.proxy_manager.kill_mitmproxy_processes()
             
             # 备份原始代理设置
             try:
                 self.logger.info("步骤2: 正在备份原始网络配置...")
                 self.proxy_manager.backup_proxy_settings()
             except Exception as e:
-                self.logger.warning(f"⚠️ 备份网络配置失败: {e}")
+                self.logger.warning("⚠️ 备份网络配置失败: %s", e)
             
-            current_path = os.path.dirname(os.path.realpath(__file__))
-            extractor_path = os.path.join(current_path, 'cookie_extractor.py')
+            extractor_path = EXTRACTOR_PATH
             
             if not os.path.exists(extractor_path):
-                self.logger.error(f"❌ 未找到cookie_extractor.py文件: {extractor_path}")
+                self.logger.error("❌ 未找到cookie_extractor.py文件: %s", extractor_path)
                 return False
             
             command = ["mitmdump", "-s", extractor_path, "--listen-port", "8080", "--ssl-insecure"]
             
-            self.logger.info(f"步骤3: 正在启动命令: {' '.join(command)}")
+            self.logger.info("步骤3: 正在启动命令: %s", ' '.join(command))
             
             # 检查mitmdump是否已安装
-            try:
-                check_result = subprocess.run(["mitmdump", "--version"], 
-                                            capture_output=True, text=True, timeout=5)
-                if check_result.returncode != 0:
-                    self.logger.error("❌ mitmdump未正确安装或无法运行")
-                    return False
-                self.logger.info(f"✅ mitmdump版本: {check_result.stdout.strip()}")
-            except Exception as e:
-                self.logger.error(f"❌ 检查mitmdump失败: {e}")
+            if not self._check_mitmdump():
                 return False
             
-            # 不重定向输出，让mitmproxy直接输出到控制台，避免管道阻塞
-            self.mitm_process = subprocess.Popen(command)
+            # 输出写入日志文件：不与主程序争用控制台，也不存在管道写满阻塞的问题
+            os.makedirs(LOG_DIR, exist_ok=True)
+            with open(self.MITM_LOG_FILE, 'wb') as mitm_log:
+                self.mitm_process = subprocess.Popen(command, stdout=mitm_log, stderr=subprocess.STDOUT)
+            self.logger.info("mitmdump输出已重定向到: %s", self.MITM_LOG_FILE)
 
-            self.logger.info(f"🔄 Cookie抓取器进程已启动，PID: {self.mitm_process.pid}")
+            self.logger.info("🔄 Cookie抓取器进程已启动，PID: %s", self.mitm_process.pid)
 
             # 等待并验证代理服务正常
+            # 端口就绪由 wait_for_proxy_ready 以毫秒级间隔探测，无需预先固定等待
             self.logger.info("步骤4: 等待代理服务启动... (最多30秒)")
-            time.sleep(3)  # 减少初始等待时间
-
             if self.proxy_manager.wait_for_proxy_ready(max_wait=30):
-                self.logger.info(f"✅ Cookie抓取器已成功启动并运行正常 (PID: {self.mitm_process.pid})")
+                self.logger.info("✅ Cookie抓取器已成功启动并运行正常 (PID: %s)", self.mitm_process.pid)
                 return True
             else:
                 self.logger.error("❌ 代理服务无法正常启动")
                 # 检查进程是否还在运行
                 if self.mitm_process.poll() is not None:
-                    self.logger.error(f"进程已退出，返回码: {self.mitm_process.returncode}")
+                    self.logger.error("进程已退出，返回码: %s", self.mitm_process.returncode)
                 else:
                     self.logger.error("进程仍在运行，但代理服务无响应")
                 self.stop_cookie_extractor()
@@ -134,34 +215,55 @@ class ReadCookie(object):
             self.stop_cookie_extractor()
             return False
         except FileNotFoundError as e:
-            self.logger.error(f"❌ 找不到必要的可执行文件: {e}")
+            self.logger.error("❌ 找不到必要的可执行文件: %s", e)
             return False
         except Exception as e:
-            self.logger.error(f"❌ 启动Cookie抓取器时出现意外错误: {e}")
+            self.logger.error("❌ 启动Cookie抓取器时出现意外错误: %s", e)
             import traceback
             self.logger.error(traceback.format_exc())
             self.stop_cookie_extractor()
             return False
 
+    def _check_mitmdump(self) -> bool:
+        """
+        确认mitmdump已安装且可运行；同一可执行文件（路径、修改时间、大小不变）
+        在进程内只执行一次 --version 探测，逐个公众号重启抓取器时不再重复启动解释器
+        """
+        mitm_path = shutil.which("mitmdump")
+        if not mitm_path:
+            self.logger.error("❌ 检查mitmdump失败: 未在PATH中找到mitmdump")
+            return False
+
+        st = os.stat(mitm_path)
+        cache_key = (mitm_path, st.st_mtime_ns, st.st_size)
+        version = self._mitmdump_versions.get(cache_key)
+        if version is None:
+            try:
+                check_result = subprocess.run([mitm_path, "--version"],
+                                              capture_output=True, text=True, timeout=5)
+            except (OSError, subprocess.SubprocessError) as e:
+                self.logger.error("❌ 检查mitmdump失败: %s", e)
+                return False
+            if check_result.returncode != 0:
+                self.logger.error("❌ mitmdump未正确安装或无法运行")
+                return False
+            version = check_result.stdout.strip()
+            ReadCookie._mitmdump_versions[cache_key] = version
+        self.logger.info("✅ mitmdump版本: %s", version)
+        return True
+
     def stop_cookie_extractor(self):
         """停止后台的mitmdump进程并确保代理完全关闭"""
         self.logger.info("🧹 开始清理抓取器资源...")
         
-        # 1. 直接停止mitmproxy进程
+        # 1. 发出终止信号，等待与强制结束交给后台线程，不阻塞调用方
         if self.mitm_process and self.mitm_process.poll() is None:
-            self.logger.info(f"正在停止Cookie抓取器 (PID: {self.mitm_process.pid})...")
+            self.logger.info("正在停止Cookie抓取器 (PID: %s)...", self.mitm_process.pid)
             try:
-                # 优雅地终止进程
                 self.mitm_process.terminate()
-                self.mitm_process.wait(timeout=5)
-                self.logger.info("Cookie抓取器已成功终止。")
-            except subprocess.TimeoutExpired:
-                self.logger.warning("终止超时，正在强制终止...")
-                self.mitm_process.kill()
-                self.mitm_process.wait(timeout=3)
-                self.logger.info("Cookie抓取器已被强制终止。")
+                threading.Thread(target=self._reap, args=(self.mitm_process,), daemon=True).start()
             except Exception as e:
-                self.logger.error(f"停止Cookie抓取器时发生错误: {e}")
+                self.logger.error("停止Cookie抓取器时发生错误: %s", e)
         else:
             self.logger.info("Cookie抓取器未在运行或已停止。")
         
@@ -178,18 +280,40 @@ class ReadCookie(object):
         else:
             self.logger.warning("⚠️ 网络连接验证失败，可能需要手动检查")
 
+    def _reap(self, process):
+        """等待已发出terminate的进程退出，超时则强制结束；需要同步关闭时可直接调用"""
+        try:
+            process.wait(timeout=5)
+            self.logger.info("Cookie抓取器已成功终止。")
+        except subprocess.TimeoutExpired:
+            self.logger.warning("终止超时，正在强制终止...")
+            try:
+                process.kill()
+                process.wait(timeout=3)
+                self.logger.info("Cookie抓取器已被强制终止。")
+            except Exception as e:
+                self.logger.error("强制终止Cookie抓取器时发生错误: %s", e)
+        except Exception as e:
+            self.logger.error("停止Cookie抓取器时发生错误: %s", e)
+
     def wait_for_new_cookie(self, timeout: int = 60) -> bool:
         """
         在指定时间内等待wechat_keys.txt文件被创建并包含有效内容。
         """
-        self.logger.info(f"正在等待Cookie数据写入 '{self.outfile}'... (超时: {timeout}秒)")
+        self.logger.info("正在等待Cookie数据写入 '%s'... (超时: %s秒)", self.outfile, timeout)
         start_time = time.time()
+        last_size = -1
         while time.time() - start_time < timeout:
-            if os.path.exists(self.outfile) and os.path.getsize(self.outfile) > 0:
-                time.sleep(1) # 等待文件写完
+            try:
+                size = os.stat(self.outfile).st_size
+            except FileNotFoundError:
+                size = -1
+            # 相邻两次检查大小一致即认为已写完，不再固定等待1秒
+            if size > 0 and size == last_size:
                 self.logger.info("检测到Cookie文件已生成。")
                 return True
-            time.sleep(1)
+            last_size = size
+            time.sleep(self.POLL_INTERVAL)
         
         self.logger.error("等待Cookie超时！")
         return False